@@ -13,14 +13,71 @@ g_ESRI_variable_1 = os.path.join(arcpy.env.packageWorkspace, "..\\cd\\acd")
 import arcpy
 import traceback
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from arcgis.gis import GIS
 from arcgis.raster import ImageryLayer
+from arcgis.features import FeatureLayer
 import logging
 import os
+import math
+import json
+import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Known spatial reference (Web Mercator) shared by every geometry in the tool
+_WEB_MERCATOR_SR = arcpy.SpatialReference(3857)
+
+# Above this many matching OBJECTIDs, fetch by ID chunks instead of paging
+# through the spatial query, which can stall on very large selections.
+ID_CHUNK_THRESHOLD = 50000
+ID_CHUNK_SIZE = 200
+
+# Above this many sheet numbers, mapsheet_value is written to a scratch file
+# and the parameter holds the file path instead of the full list
+SHEET_FILE_THRESHOLD = 1000
+
+try:
+    import ijson
+except ImportError:  # not shipped with every ArcGIS Pro environment
+    ijson = None
+
+try:
+    import orjson
+except ImportError:  # not shipped with every ArcGIS Pro environment
+    orjson = None
+
+# Optional CA bundle for the portal's certificate. When set, TLS certificates
+# are verified against it; otherwise verification stays disabled as before.
+# A tool-specific variable is used so a system-wide REQUESTS_CA_BUNDLE (e.g. for
+# a corporate proxy) does not break portals with self-signed certificates.
+_CA_BUNDLE = os.environ.get("MAPSHEET_CA_BUNDLE") or None
+
+# Shared HTTP session so repeated requests reuse pooled keep-alive connections
+# instead of paying a fresh TCP + TLS handshake each time.
+_SESSION = requests.Session()
+_SESSION.verify = _CA_BUNDLE or False
+_SESSION.mount(
+    "https://",
+    HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=10,
+        max_retries=Retry(total=3, backoff_factor=0.3),
+    ),
+)
 
 
 def error_msgs(log_dir):
     log_file = os.path.join(log_dir, "process_log.txt")
+
+    # Already logging to this file (e.g. repeated calls in one session)
+    if any(
+        getattr(handler, "baseFilename", None) == os.path.abspath(log_file)
+        for handler in logging.root.handlers
+    ):
+        return logging.getLogger()
+
     for handler in logging.root.handlers[:]:
         logging.root.removeHandler(handler)
     logging.basicConfig(
@@ -33,126 +90,312 @@ def error_msgs(log_dir):
     return logger
 
 
+@functools.lru_cache(maxsize=8)
+def _connect_gis(portal_url, token):
+    # Verify the portal against MAPSHEET_CA_BUNDLE when it is set (the same store
+    # as _SESSION); otherwise SSL certificate issues are ignored
+    return GIS(portal_url, token=token, verify_cert=_CA_BUNDLE or False)
+
+
+@functools.lru_cache(maxsize=8)
+def get_imagery_layer(imagery_service_layer, gis):
+    """
+    Returns a process-wide ImageryLayer so repeated runs skip the layer
+    metadata request.
+    """
+    return ImageryLayer(imagery_service_layer, gis=gis)
+
+
+@functools.lru_cache(maxsize=8)
+def get_feature_layer(mapsheet_layer_url, gis):
+    """
+    Returns a process-wide FeatureLayer so repeated runs skip the layer
+    metadata request.
+    """
+    return FeatureLayer(mapsheet_layer_url, gis=gis)
+
+
 def login_to_gis(logger, portal_url, token):
     logger.info(f"Connecting to GIS with Portal URL: {portal_url}")
-    # If you prefer to ignore SSL certificate issues, use verify_cert=False
-    gis = GIS(portal_url, token=token, verify_cert=False)
+    # Reuses the existing connection for the same portal and token
+    gis = _connect_gis(portal_url, token)
     return gis
 
 
 def imagery_query(logger, imagery_service_layer, gis, sentinel_image_name):
-    imagery_layer = ImageryLayer(imagery_service_layer, gis=gis)
-    where_clause = f"Name='{sentinel_image_name}'"
+    """
+    Looks up the image by name and returns its OBJECTID together with its ESRI
+    JSON footprint geometry in EPSG:3857, or (None, None) if nothing matches.
+    """
+    imagery_layer = get_imagery_layer(imagery_service_layer, gis)
+    # Escape single quotes so names like "O'Brien" don't break the SQL
+    safe_name = sentinel_image_name.replace("'", "''")
+    where_clause = f"Name = '{safe_name}'"
     logger.info(f"Querying imagery layer with where clause: {where_clause}")
 
-    query_result = imagery_layer.query(
-        where=where_clause, return_geometry=False, out_fields=["OBJECTID"]
+    # Only the first match is used, so don't ask for more. The footprint is
+    # returned inline to save a second request for the same record; with
+    # return_geometry=True the ArcGIS API returns a FeatureSet, not a dict.
+    feature_set = imagery_layer.query(
+        where=where_clause,
+        return_geometry=True,
+        out_fields=["OBJECTID"],
+        out_sr=3857,
+        result_record_count=1,
     )
 
-    if "features" in query_result and len(query_result["features"]) > 0:
-        object_id = query_result["features"][0]["attributes"]["OBJECTID"]
-        return object_id
+    if feature_set.features:
+        feature = feature_set.features[0]
+        object_id = feature.attributes["OBJECTID"]
+        geometry = dict(feature.geometry) if feature.geometry else None
+        return object_id, geometry
     else:
         warning_msg = "No results found for the given image name."
         arcpy.AddWarning(warning_msg)
         logger.warning(warning_msg)
+        return None, None
+
+
+def read_geometry_json(response):
+    """
+    Reads only the "geometry" object out of a streamed image JSON response so
+    the rest of the item metadata is never materialized. Falls back to parsing
+    the whole body (with orjson when installed) when ijson is not available.
+    """
+    if ijson is None:
+        if orjson is not None:
+            return orjson.loads(response.content).get("geometry", {})
+        return response.json().get("geometry", {})
+
+    # Let urllib3 undo any gzip/deflate encoding before ijson sees the bytes
+    response.raw.decode_content = True
+    try:
+        return dict(ijson.kvitems(response.raw, "geometry", use_float=True))
+    except ijson.JSONError as e:
+        raise ValueError(str(e)) from e
+
+
+def build_polygon(ring, spatial_reference):
+    """
+    Builds an ArcPy Polygon from a single ESRI JSON ring. Uses arcpy.AsShape so
+    ArcGIS parses the coordinates natively instead of one arcpy.Point per vertex.
+    """
+    return arcpy.AsShape(
+        {"rings": [ring], "spatialReference": spatial_reference}, True
+    )
+
+
+def build_geometry(geometry):
+    """
+    Converts an ESRI JSON polygon geometry to an ArcPy Polygon in a known
+    spatial reference (EPSG:3857).
+    """
+    rings = geometry.get("rings", [])
+
+    # Basic validation
+    if not rings or not isinstance(rings[0], list) or len(rings[0]) == 0:
+        arcpy.AddError("Error: Invalid ring geometry format.")
         return None
 
+    # Use a known spatial reference (Web Mercator) unless the service
+    # reports its own
+    spatial_reference = geometry.get("spatialReference") or {"wkid": 3857}
+
+    # Build the polygon from the outer ring
+    polygon = build_polygon(rings[0], spatial_reference)
+
+    # Make sure the polygon ends up in EPSG:3857 (102100 reports
+    # latestWkid 3857)
+    wkid = spatial_reference.get("latestWkid", spatial_reference.get("wkid"))
+    if wkid != 3857:
+        polygon = polygon.projectAs(_WEB_MERCATOR_SR)
+
+    return polygon
+
 
 def retrieve_and_build_geometry(logger, imagery_service_layer, object_id, token):
     """
-    Retrieves geometry JSON from a service URL, converts it to an ArcPy Polygon,
-    and builds the polygon using a known spatial reference (EPSG:3857).
+    Retrieves geometry JSON from a service URL and converts it to an ArcPy
+    Polygon. Only needed when the imagery query did not return the geometry.
     """
     image_url = f"{imagery_service_layer}/{object_id}?token={token}&f=json"
 
     logger.info(f"Retrieving image data from URL: {image_url}")
 
-    # Perform the request
-    response = requests.get(image_url, verify=False)
-
-    if response.status_code == 200:
-        try:
-            response_json = response.json()
-            geometry = response_json["geometry"]
-            rings = geometry.get("rings", [])
-
-            # Basic validation
-            if not rings or not isinstance(rings[0], list) or len(rings[0]) == 0:
-                arcpy.AddError("Error: Invalid ring geometry format.")
-                return None
-
-            # Use a known spatial reference (Web Mercator)
-            web_mercator_sr = arcpy.SpatialReference(3857)
-
-            # Build the polygon in EPSG:3857
-            polygon = arcpy.Polygon(
-                arcpy.Array([arcpy.Point(*coords) for coords in rings[0]]),
-                web_mercator_sr,
+    # Perform the request, streaming the body so only the geometry is parsed
+    # Pass verify explicitly, otherwise requests lets REQUESTS_CA_BUNDLE or
+    # CURL_CA_BUNDLE override the session setting
+    with _SESSION.get(
+        image_url, verify=_SESSION.verify, timeout=(5, 30), stream=True
+    ) as response:
+        if response.status_code != 200:
+            error_msg = (
+                f"Failed to retrieve data from the URL. "
+                f"Status code: {response.status_code}"
             )
+            arcpy.AddError(error_msg)
+            logger.error(error_msg)
+            return None
 
-            return polygon
+        try:
+            geometry = read_geometry_json(response)
 
         except ValueError:
             tb = traceback.format_exc()
             error_msg = (
-                f"Failed to parse JSON. Raw response: {response.text}\n"
+                f"Failed to parse JSON from: {image_url}\n"
                 f"Traceback details:\n{tb}"
             )
             arcpy.AddError(error_msg)
             logger.error(error_msg)
             return None
 
-    else:
-        error_msg = (
-            f"Failed to retrieve data from the URL. "
-            f"Status code: {response.status_code}"
+    return build_geometry(geometry)
+
+
+def geometry_cache_path(cache_dir, imagery_service_layer, sentinel_image_name):
+    """
+    Builds the on-disk cache file path for an imagery layer / image name pair.
+    """
+    key = hashlib.sha1(
+        f"{imagery_service_layer}|{sentinel_image_name}".encode("utf-8")
+    ).hexdigest()
+    return os.path.join(cache_dir, "geom_cache", f"{key}.json")
+
+
+def load_cached_geometry(logger, cache_path):
+    """
+    Loads a previously cached footprint polygon. Returns (object_id, polygon)
+    or (None, None) if there is no usable cache entry.
+    """
+    if not os.path.exists(cache_path):
+        return None, None
+
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+
+        polygon = arcpy.FromWKB(
+            bytearray.fromhex(entry["rings_wkb"]),
+            arcpy.SpatialReference(entry["sr_wkid"]),
         )
-        arcpy.AddError(error_msg)
-        logger.error(error_msg)
-        return None
+        logger.info(f"Loaded cached geometry from: {cache_path}")
+        return entry["object_id"], polygon
+
+    except Exception as e:
+        warning_msg = f"Ignoring unreadable geometry cache {cache_path}: {str(e)}"
+        arcpy.AddWarning(warning_msg)
+        logger.warning(warning_msg)
+        return None, None
 
 
-def perform_spatial_selection(logger, mapsheet_layer_url, polygon, gis):
+def save_cached_geometry(logger, cache_path, object_id, polygon):
     """
-    Fetches all SHEET_NO values from the feature service by paging through results.
+    Stores the OBJECTID and footprint polygon (as hex WKB) in a JSON file so
+    later runs for the same image can skip the imagery REST calls.
     """
-    # Get an ArcGIS FeatureLayer object pointing to your map sheet layer.
-    from arcgis.features import FeatureLayer
+    entry = {
+        "object_id": object_id,
+        "rings_wkb": bytes(polygon.WKB).hex(),
+        "sr_wkid": polygon.spatialReference.factoryCode,
+    }
 
-    # Create the FeatureLayer using ArcGIS Python API
-    feature_layer = FeatureLayer(mapsheet_layer_url, gis=gis)
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
 
-    # Convert the ArcPy polygon to a geometry dict for the ArcGIS API
-    # (assuming your polygon is in EPSG:3857 / Web Mercator)
-    geom_dict = polygon.__geo_interface__  # GeoJSON-like dictionary
+        # Write to a temp file first so a half-written entry is never read
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, cache_path)
+        logger.info(f"Cached geometry to: {cache_path}")
+
+    except OSError as e:
+        warning_msg = f"Could not write geometry cache {cache_path}: {str(e)}"
+        arcpy.AddWarning(warning_msg)
+        logger.warning(warning_msg)
+
+
+def fetch_sheet_no_page(feature_layer, geom_dict, offset, page_size, distinct=True):
+    """
+    Fetches a single page of SHEET_NO values starting at the given offset and
+    returns the FeatureSet. With distinct=False plain records are paged, for
+    services that cannot page distinct values.
+    """
+    # Query with geometry filtering (spatial relationship = "esriSpatialRelWithin")
+    # resultOffset, resultRecordCount let us get multiple pages. Distinct results
+    # have no OBJECTID order, so sort by sheet_no to keep the offsets stable
+    # across the separate page requests. The ArcGIS API ignores the offset and
+    # record count unless return_all_records is turned off.
+    query_result = feature_layer.query(
+        geometry=geom_dict,
+        geometry_type="esriGeometryPolygon",
+        in_sr=3857,
+        spatial_rel="esriSpatialRelWithin",
+        out_fields="sheet_no",
+        return_distinct_values=distinct,
+        order_by_fields="sheet_no" if distinct else None,
+        return_geometry=False,
+        return_all_records=False,
+        result_offset=offset,
+        result_record_count=page_size,
+    )
+    return query_result
+
+
+def fetch_sheet_no_by_ids(feature_layer, object_ids):
+    """
+    Fetches the SHEET_NO values for an explicit chunk of OBJECTIDs and returns
+    the FeatureSet.
+    """
+    query_result = feature_layer.query(
+        object_ids=",".join(str(oid) for oid in object_ids),
+        out_fields="sheet_no",
+        return_distinct_values=True,
+        return_geometry=False,
+    )
+    return query_result
+
+
+def fetch_sheet_no_statistics(feature_layer, geom_dict):
+    """
+    Fetches the unique SHEET_NO values in a single grouped statistics query.
+    Used when the service does not support distinct values with paging.
+    """
+    query_result = feature_layer.query(
+        geometry=geom_dict,
+        geometry_type="esriGeometryPolygon",
+        in_sr=3857,
+        spatial_rel="esriSpatialRelWithin",
+        group_by_fields_for_statistics="sheet_no",
+        out_statistics=[
+            {
+                "statisticType": "count",
+                "onStatisticField": "sheet_no",
+                "outStatisticFieldName": "sheet_count",
+            }
+        ],
+        return_geometry=False,
+    )
+    return [feat.attributes["sheet_no"] for feat in query_result.features]
 
-    # Now gather SHEET_NO with pagination
-    sheet_no_list = []
-    page_size = 2000
-    offset = 0
 
+def fetch_sequentially(logger, feature_layer, geom_dict, offset, page_size, distinct):
+    """
+    Pages through the SHEET_NO values one request at a time starting at the
+    given offset, yielding each page's values as it arrives.
+    """
     # Keep looping while records are returned
     while True:
         try:
-            # Query with geometry filtering (spatial relationship = "esriSpatialRelWithin")
-            # resultOffset, resultRecordCount let us get multiple pages
-            query_result = feature_layer.query(
-                geometry=geom_dict,
-                spatial_rel="esriSpatialRelWithin",
-                out_fields="sheet_no",
-                return_geometry=False,
-                result_offset=offset,
-                result_record_count=page_size,
-            )
-
-            features = query_result.features
+            features = fetch_sheet_no_page(
+                feature_layer, geom_dict, offset, page_size, distinct
+            ).features
             if not features:
                 break
 
-            # Collect SHEET_NO values
-            for feat in features:
-                sheet_no_list.append(feat.attributes["sheet_no"])
+            # Hand this page's SHEET_NO values to the caller
+            yield from (feat.attributes["sheet_no"] for feat in features)
 
             # Increase offset and see if we need another page
             offset += page_size
@@ -169,30 +412,216 @@ def perform_spatial_selection(logger, mapsheet_layer_url, polygon, gis):
             logger.error(error_msg)
             break
 
-    return sheet_no_list
 
+def fetch_concurrently(fetch, jobs, max_workers):
+    """
+    Runs fetch(*args) for every (label, args) item in jobs on a thread pool and
+    yields the SHEET_NO values of each job as it completes. The first failed job
+    cancels the remaining ones and re-raises, so a partial result is never
+    reported as complete.
+    """
+    # The queries are independent and read-only, so they can be issued in
+    # parallel. Keep the worker count low to respect server rate limits.
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch, *args): label for label, args in jobs}
+        for future in as_completed(futures):
+            # Drop our reference so finished pages can be freed once yielded
+            label = futures.pop(future)
+            try:
+                features = future.result().features
+            except Exception as e:
+                for pending in futures:
+                    pending.cancel()
+                raise RuntimeError(
+                    f"Error during {label} query for SHEET_NO: {str(e)}"
+                ) from e
+
+            yield from (feat.attributes["sheet_no"] for feat in features)
+
+
+def perform_spatial_selection(
+    logger, mapsheet_layer_url, polygon, gis, max_workers=4
+):
+    """
+    Yields the SHEET_NO values from the feature service page by page as they
+    arrive, so only the pages in flight are held in memory. The values are
+    distinct within a page but may repeat across pages; callers deduplicate with
+    set(). Very large selections are fetched in OBJECTID chunks instead.
+    The first page is fetched on its own; the rest are requested concurrently
+    once the distinct count is known, or sequentially if it is not. If distinct
+    values cannot be paged, a single grouped statistics query is tried and,
+    failing that, plain records are paged sequentially instead.
+    """
+    # Create the FeatureLayer using ArcGIS Python API
+    feature_layer = get_feature_layer(mapsheet_layer_url, gis)
+
+    # Drop redundant vertices along near-straight edges to shrink the request;
+    # 1 meter in Web Mercator is far below Sentinel-2 resolution. The simplified
+    # copy is only used for this query and is never cached.
+    query_polygon = polygon.generalize(1.0)
+
+    # Convert the ArcPy polygon to an ESRI JSON geometry dict, which the REST
+    # API takes as-is (the polygon is in EPSG:3857 / Web Mercator). GeoJSON
+    # would have to be converted back to ESRI JSON by the ArcGIS API.
+    geom_dict = json.loads(query_polygon.JSON)
+
+    # Now gather SHEET_NO with pagination
+    page_size = 2000
 
-def print_sheet_no_count(sheet_no_list):
+    # Ask the service for the total number of matching records first so that
+    # every page offset is known up front.
+    try:
+        total = feature_layer.query(
+            geometry=geom_dict,
+            geometry_type="esriGeometryPolygon",
+            in_sr=3857,
+            spatial_rel="esriSpatialRelWithin",
+            out_fields="sheet_no",
+            return_distinct_values=True,
+            order_by_fields="sheet_no",
+            return_count_only=True,
+        )
+    except Exception as e:
+        warning_msg = f"Distinct count query failed: {str(e)}"
+        arcpy.AddWarning(warning_msg)
+        logger.warning(warning_msg)
+        total = None
+
+    # Paging through a huge selection can stall, whereas explicit ID chunks
+    # bypass the maxRecordCount paging. Records are at least as many as
+    # distinct values, so a large distinct count settles it; the plain record
+    # count is only needed when the distinct count is unavailable.
+    record_count = total
+    if total is None:
+        try:
+            record_count = feature_layer.query(
+                geometry=geom_dict,
+                geometry_type="esriGeometryPolygon",
+                in_sr=3857,
+                spatial_rel="esriSpatialRelWithin",
+                return_count_only=True,
+            )
+        except Exception as e:
+            warning_msg = (
+                f"Record count query failed, continuing with paging: {str(e)}"
+            )
+            arcpy.AddWarning(warning_msg)
+            logger.warning(warning_msg)
+
+    # Only fetch the OBJECTIDs when the selection is actually that large
+    object_ids = []
+    if record_count is not None and record_count > ID_CHUNK_THRESHOLD:
+        try:
+            ids_result = feature_layer.query(
+                geometry=geom_dict,
+                geometry_type="esriGeometryPolygon",
+                in_sr=3857,
+                spatial_rel="esriSpatialRelWithin",
+                return_ids_only=True,
+            )
+            object_ids = ids_result.get("objectIds") or []
+        except Exception as e:
+            warning_msg = f"OBJECTID probe failed, continuing with paging: {str(e)}"
+            arcpy.AddWarning(warning_msg)
+            logger.warning(warning_msg)
+
+    if object_ids:
+        chunks = [
+            object_ids[i : i + ID_CHUNK_SIZE]
+            for i in range(0, len(object_ids), ID_CHUNK_SIZE)
+        ]
+        logger.info(
+            f"Fetching {len(object_ids)} records in {len(chunks)} OBJECTID chunks "
+            f"with {max_workers} workers"
+        )
+        jobs = [
+            (f"OBJECTID chunk {n}", (feature_layer, chunk))
+            for n, chunk in enumerate(chunks)
+        ]
+        yield from fetch_concurrently(fetch_sheet_no_by_ids, jobs, max_workers)
+        return
+
+    # Fetch the first page on its own; a service can count distinct values yet
+    # still reject paging them (supportsPaginationOnAggregatedQueries false)
+    try:
+        first_page = fetch_sheet_no_page(feature_layer, geom_dict, 0, page_size)
+    except Exception as e:
+        warning_msg = (
+            f"Paging distinct values failed, trying a statistics query: {str(e)}"
+        )
+        arcpy.AddWarning(warning_msg)
+        logger.warning(warning_msg)
+
+        try:
+            sheet_no_values = fetch_sheet_no_statistics(feature_layer, geom_dict)
+        except Exception as e:
+            warning_msg = (
+                f"Statistics query failed, falling back to sequential paging: "
+                f"{str(e)}"
+            )
+            arcpy.AddWarning(warning_msg)
+            logger.warning(warning_msg)
+            yield from fetch_sequentially(
+                logger, feature_layer, geom_dict, 0, page_size, distinct=False
+            )
+        else:
+            yield from sheet_no_values
+        return
+
+    features = first_page.features
+    yield from (feat.attributes["sheet_no"] for feat in features)
+    if len(features) < page_size:
+        return
+
+    if total is not None:
+        offsets = range(page_size, int(total), page_size)
+        logger.info(
+            f"Fetching {total} records in {math.ceil(total / page_size)} pages "
+            f"with {max_workers} workers"
+        )
+        jobs = [
+            (f"paged (offset {off})", (feature_layer, geom_dict, off, page_size))
+            for off in offsets
+        ]
+        yield from fetch_concurrently(fetch_sheet_no_page, jobs, max_workers)
+        return
+
+    yield from fetch_sequentially(
+        logger, feature_layer, geom_dict, page_size, page_size, distinct=True
+    )
+
+
+def print_sheet_no_count(sheet_no_set):
     """
     Prints the unique sheet numbers and their total count to the ArcGIS console
     and sets the derived output parameters (mapsheet_value, mapsheet_count).
+    Large results are written one per line to a scratch file whose path is
+    returned in mapsheet_value instead.
     Indices (based on your screenshot):
       5 -> mapsheet_value
       6 -> mapsheet_count
     """
-    unique_sheet_no = set(sheet_no_list)
-
     # Sort the sheet numbers for consistent output (optional)
-    sorted_sheet_list = sorted(unique_sheet_no)
+    sorted_sheet_list = sorted(sheet_no_set)
 
-    # Build a list-like string: e.g. [T47N, T48N, T49N]
-    sheets_str = "[" + ", ".join(sorted_sheet_list) + "]"
+    if len(sorted_sheet_list) > SHEET_FILE_THRESHOLD:
+        # Write newline-delimited values rather than one huge joined string
+        sheets_path = os.path.join(arcpy.env.scratchFolder, "sheet_nos.txt")
+        with open(sheets_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{sheet_no}\n" for sheet_no in sorted_sheet_list)
+        arcpy.AddMessage(f"Sheet numbers written to: {sheets_path}")
 
-    # Set the derived output parameter (index 5 = mapsheet_value)
-    arcpy.SetParameterAsText(5, sheets_str)
+        # Set the derived output parameter (index 5 = mapsheet_value)
+        arcpy.SetParameterAsText(5, sheets_path)
+    else:
+        # Build a list-like string: e.g. [T47N, T48N, T49N]
+        sheets_str = "[" + ", ".join(sorted_sheet_list) + "]"
+
+        # Set the derived output parameter (index 5 = mapsheet_value)
+        arcpy.SetParameterAsText(5, sheets_str)
 
     # Compute the total count
-    total_sheet_no_count = len(unique_sheet_no)
+    total_sheet_no_count = len(sheet_no_set)
 
     # Set the derived output parameter (index 6 = mapSheet_Count)
     arcpy.SetParameterAsText(6, str(total_sheet_no_count))
@@ -217,27 +646,42 @@ def script_tool(
         # 1. Login to GIS
         gis = login_to_gis(logger, portal_url, token)
 
-        # 2. Imagery Query
-        object_id = imagery_query(
-            logger, imagery_service_layer, gis, sentinel_image_name
+        # 2. Check the on-disk geometry cache before hitting the imagery service
+        cache_path = geometry_cache_path(
+            log_dir, imagery_service_layer, sentinel_image_name
         )
-        if object_id is not None:
-            # 3. Retrieve and build geometry
-            polygon = retrieve_and_build_geometry(
-                logger, imagery_service_layer, object_id, token
+        object_id, polygon = load_cached_geometry(logger, cache_path)
+
+        if polygon is None:
+            # 3. Imagery Query (returns the footprint geometry inline)
+            object_id, geometry = imagery_query(
+                logger, imagery_service_layer, gis, sentinel_image_name
             )
-            if polygon is not None:
-                # 4. Perform spatial selection
-                sheet_no_list = perform_spatial_selection(
-                    logger, mapsheet_layer_url, polygon, gis
+            if object_id is None:
+                arcpy.AddMessage(
+                    "No valid OBJECTID found. Exiting without further processing."
                 )
+                return
+
+            # 4. Build geometry, fetching it separately only if it was missing
+            if geometry:
+                polygon = build_geometry(geometry)
+            else:
+                polygon = retrieve_and_build_geometry(
+                    logger, imagery_service_layer, object_id, token
+                )
+            if polygon is None:
+                return
 
-                # 5. Print count and mapsheet no (also sets derived outputs).
-                print_sheet_no_count(sheet_no_list)
-        else:
-            arcpy.AddMessage(
-                "No valid OBJECTID found. Exiting without further processing."
-            )
+            save_cached_geometry(logger, cache_path, object_id, polygon)
+
+        # 5. Perform spatial selection
+        sheet_no_set = set(
+            perform_spatial_selection(logger, mapsheet_layer_url, polygon, gis)
+        )
+
+        # 6. Print count and mapsheet no (also sets derived outputs).
+        print_sheet_no_count(sheet_no_set)
 
     except Exception as e:
         tb = traceback.format_exc()